@@ -1,15 +1,198 @@
 # fetcher/network.py
 
 import os
-import time
-import json
+import queue
+import base64
+import binascii
+import socket
+import orjson
 import requests
-from typing import Dict, Any
-from requests.exceptions import HTTPError, ConnectionError, Timeout
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tqdm import tqdm
+import threading
+import weakref
+from typing import Dict, Any, List, Optional, Tuple
+from itertools import chain, islice
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, wait
+from tqdm.contrib.concurrent import thread_map
 
-from .utils import save_to_json, create_directories, validate_board_name
+from .utils import save_to_json, create_directories, validate_board_name, TokenBucket
+
+
+class _SocketOptionsAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter whose connections enable TCP keepalive on top of urllib3's default socket options.
+    """
+
+    socket_options = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs.setdefault('socket_options', self.socket_options)
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+
+def _project_starter(post: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Projects a post onto the fields saved for thread starters.
+    """
+    get = post.get
+    return {
+        'no': post['no'],
+        'now': get('now', ''),
+        'name': get('name', ''),
+        'sub': get('sub', ''),
+        'time': get('time', 0),
+        'semantic_url': get('semantic_url', ''),
+        'replies': get('replies', 0),
+        'images': get('images', 0)
+    }
+
+
+def _project_image(post: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Projects a post onto the fields saved for image posts, excluding the image URL.
+    """
+    get = post.get
+    return {
+        'no': post['no'],
+        'now': get('now', ''),
+        'name': get('name', ''),
+        'com': get('com', ''),
+        'filename': get('filename', ''),
+        'ext': get('ext', ''),
+        'w': get('w', 0),
+        'h': get('h', 0),
+        'time': get('time', 0),
+        'md5': get('md5', ''),
+        'fsize': get('fsize', 0),
+        'resto': get('resto', 0)
+    }
+
+
+class ImagePrefetcher:
+    """
+    A class to download image files concurrently over a shared session.
+    """
+
+    def __init__(self, session: requests.Session, logger=None, max_workers: int = 8,
+                 headers: Dict[str, str] = None):
+        """
+        Initializes the ImagePrefetcher instance.
+
+        Parameters
+        ----------
+        session : requests.Session
+            The session to download with, so pooled connections are reused.
+        logger
+            Logger instance for logging messages.
+        max_workers : int
+            Number of threads used to download images concurrently.
+        headers : dict
+            Extra headers sent with every download.
+        """
+        self.session = session
+        self.logger = logger
+        self.headers = headers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+        self._submitted = set()
+        self._lock = threading.Lock()
+
+    def submit(self, url: str, target_path: str):
+        """
+        Schedules an image download unless the file exists or is already scheduled.
+
+        Parameters
+        ----------
+        url : str
+            The image URL to download.
+        target_path : str
+            The file path to save the image to.
+        """
+        with self._lock:
+            if target_path in self._submitted or os.path.exists(target_path):
+                return
+            self._submitted.add(target_path)
+            self._futures.append(self._executor.submit(self._download, url, target_path))
+
+    def _download(self, url: str, target_path: str):
+        """
+        Streams an image to a temporary file and moves it into place once complete.
+
+        Parameters
+        ----------
+        url : str
+            The image URL to download.
+        target_path : str
+            The file path to save the image to.
+        """
+        partial_path = f"{target_path}.part"
+        try:
+            with self.session.get(url, headers=self.headers, stream=True, timeout=10) as response:
+                response.raise_for_status()
+                with open(partial_path, 'wb') as file:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        file.write(chunk)
+            os.replace(partial_path, target_path)
+        except (RequestException, OSError) as e:
+            self.logger.error("Error downloading image %s: %s", url, e)
+            try:
+                os.remove(partial_path)
+            except OSError:
+                pass
+
+    def wait(self):
+        """
+        Blocks until every scheduled download has finished.
+        """
+        with self._lock:
+            futures, self._futures = self._futures, []
+        wait(futures)
+        for future in futures:
+            error = future.exception()
+            if error is not None:
+                self.logger.error("Unexpected error downloading image: %s", error)
+
+    def shutdown(self):
+        """
+        Waits for scheduled downloads and releases the worker threads.
+        """
+        self._executor.shutdown(wait=True)
+
+
+def _drain(fd: int, writeq: queue.Queue, logger):
+    """
+    Writes queued payloads to a file descriptor until a None sentinel is received.
+    """
+    while True:
+        payload = writeq.get()
+        try:
+            if payload is None:
+                return
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+        except OSError as e:
+            logger.error("Error writing thread starters: %s", e)
+        finally:
+            writeq.task_done()
+
+
+def _stop_writer(fd: int, writeq: queue.Queue, writer: threading.Thread):
+    """
+    Flushes and stops a writer thread started by FourChanFetcher, then closes its file.
+    """
+    writeq.put(None)
+    writer.join()
+    os.close(fd)
 
 
 class FourChanFetcher:
@@ -20,7 +203,8 @@ class FourChanFetcher:
     BASE_URL = 'https://a.4cdn.org'
     IMAGE_URL = 'https://i.4cdn.org'
 
-    def __init__(self, board: str, output_dir: str = '.', session: requests.Session = None, logger=None):
+    def __init__(self, board: str, output_dir: str = '.', session: requests.Session = None, logger=None,
+                 max_workers: int = 5, download_images: bool = False):
         """
         Initializes the FourChanFetcher instance.
 
@@ -31,22 +215,190 @@ class FourChanFetcher:
         output_dir : str
             The directory to save fetched data.
         session : requests.Session
-            A requests session object to reuse connections.
+            A requests session object to reuse connections. If omitted, a session with a
+            pooled, retrying adapter is created. The fetcher's User-Agent is sent either way.
         logger
             Logger instance for logging messages.
+        max_workers : int
+            Number of threads used to fetch threads concurrently.
+        download_images : bool
+            Whether to download image files in addition to saving their URLs.
+
+        Raises
+        ------
+        ValueError
+            If the board name is invalid or max_workers is less than 1.
         """
         validate_board_name(board)
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
         self.board = board
         self.output_dir = output_dir
-        self.session = session or requests.Session()
+        self.session = session
         self.logger = logger
+        self.max_workers = max_workers
         self.base_path = create_directories(board, output_dir)
+        self._starter_path = os.path.join(self.base_path, 'thread_list.json')
+        self._images_dir = os.path.join(self.base_path, 'images')
         self.headers = {'User-Agent': 'fetch_4chan/1.0'}
 
+        # A caller-supplied session keeps its own adapters and headers.
+        if self.session is None:
+            self.session = requests.Session()
+            # Size the pool for concurrent workers so connections (and their TLS
+            # handshakes) are reused instead of being evicted and re-opened.
+            retries = Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET']
+            )
+            adapter = _SocketOptionsAdapter(pool_connections=4, pool_maxsize=32, max_retries=retries)
+            self.session.mount('https://', adapter)
+            self.session.headers.update(self.headers)
+            self._request_headers = None
+        else:
+            # Leave the caller's adapters alone, but still identify as this fetcher on every request.
+            self._request_headers = self.headers
+
+        # Shared across workers to respect 4chan's one request per second API rule.
+        self._bucket = TokenBucket(capacity=4, refill_per_sec=1.0)
+
+        # Validators are kept apart from the cached body so a changed catalog
+        # never pays for parsing the stale copy.
+        self._catalog_cache_path = os.path.join(self.base_path, '.catalog_cache.json')
+        self._catalog_validators_path = os.path.join(self.base_path, '.catalog_validators.json')
+        self._catalog_cache = None
+        self._catalog_validators = None
+        self._catalog_validators_loaded = False
+
+        # Thread starters from all workers are appended to a single file, so a
+        # dedicated writer thread owns the O_APPEND descriptor and workers only enqueue.
+        # Both are created on the first write; see _get_writeq.
+        self._writeq = None
+        self._writer_finalizer = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+
+        self.prefetcher = ImagePrefetcher(self.session, logger=logger, headers=self._request_headers) if download_images else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Finishes pending image downloads and thread starter writes, then releases
+        the worker threads and the thread list file. The fetcher cannot be used afterwards.
+        """
+        with self._writer_lock:
+            self._closed = True
+            finalizer = self._writer_finalizer
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+        if finalizer:
+            finalizer()
+
+    def _get_writeq(self) -> queue.Queue:
+        """
+        Returns the thread starter write queue, starting the writer thread on first use.
+
+        Returns
+        -------
+        queue.Queue
+            The queue consumed by the writer thread.
+
+        Raises
+        ------
+        RuntimeError
+            If the fetcher has been closed.
+        """
+        with self._writer_lock:
+            if self._closed:
+                raise RuntimeError("FourChanFetcher is closed")
+            if self._writeq is None:
+                fd = os.open(self._starter_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                writeq = queue.Queue()
+                writer = threading.Thread(target=_drain, args=(fd, writeq, self.logger), daemon=True)
+                writer.start()
+                # Flushes the queue when the fetcher is closed, collected or the interpreter exits.
+                self._writer_finalizer = weakref.finalize(self, _stop_writer, fd, writeq, writer)
+                self._writeq = writeq
+            return self._writeq
+
+    def _load_catalog_validators(self) -> Optional[Dict[str, Any]]:
+        """
+        Loads the ETag and Last-Modified of the cached catalog, reading the file at most once.
+
+        Returns
+        -------
+        dict or None
+            The validators with 'etag' and 'last_modified' keys, or None if no
+            cached catalog exists.
+        """
+        if not self._catalog_validators_loaded:
+            self._catalog_validators_loaded = True
+            try:
+                with open(self._catalog_validators_path, 'rb') as file:
+                    self._catalog_validators = orjson.loads(file.read())
+            except (OSError, orjson.JSONDecodeError):
+                self._catalog_validators = None
+        return self._catalog_validators
+
+    def _load_cached_catalog(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Loads the cached catalog body, parsing the cache file at most once.
+
+        Returns
+        -------
+        list or None
+            The cached catalog data, or None if it cannot be read.
+        """
+        if self._catalog_cache is None:
+            try:
+                with open(self._catalog_cache_path, 'rb') as file:
+                    self._catalog_cache = orjson.loads(file.read())
+            except (OSError, orjson.JSONDecodeError):
+                return None
+        return self._catalog_cache
+
+    def _save_catalog_cache(self, response: requests.Response, catalog_data: List[Dict[str, Any]]):
+        """
+        Persists the catalog body along with its ETag and Last-Modified validators.
+
+        Parameters
+        ----------
+        response : requests.Response
+            The catalog response carrying the raw body and validator headers.
+        catalog_data : list
+            The decoded catalog data.
+        """
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        if not validators['etag'] and not validators['last_modified']:
+            return
+        self._catalog_cache = catalog_data
+        self._catalog_validators = validators
+        try:
+            # Write the body first so the validators never point at a missing copy.
+            with open(self._catalog_cache_path, 'wb') as file:
+                file.write(response.content)
+            with open(self._catalog_validators_path, 'wb') as file:
+                file.write(orjson.dumps(validators))
+        except OSError as e:
+            self.logger.error("Error saving catalog cache: %s", e)
+
     def fetch_catalog(self) -> Dict[str, Any]:
         """
         Fetches the catalog for the specified board.
 
+        The catalog is requested conditionally using the validators of the last
+        saved copy; if the server answers 304 Not Modified the cached copy is returned.
+
         Returns
         -------
         dict
@@ -56,20 +408,38 @@ class FourChanFetcher:
         ------
         requests.exceptions.RequestException
             If an error occurs while making the HTTP request.
-        json.JSONDecodeError
+        orjson.JSONDecodeError
             If the response cannot be decoded as JSON.
         """
         catalog_url = f"{self.BASE_URL}/{self.board}/catalog.json"
+        validators = self._load_catalog_validators()
+        headers = dict(self._request_headers or {})
+        if validators:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
         try:
-            response = self.session.get(catalog_url, headers=self.headers, timeout=10)
+            self._bucket.acquire()
+            response = self.session.get(catalog_url, headers=headers, timeout=10)
             response.raise_for_status()
-            catalog_data = response.json()
+            if response.status_code == 304:
+                catalog_data = self._load_cached_catalog()
+                if catalog_data is not None:
+                    self.logger.info("Catalog not modified, using cached copy")
+                    return catalog_data
+                # The validators outlived the cached body, so fetch it unconditionally.
+                self._bucket.acquire()
+                response = self.session.get(catalog_url, headers=self._request_headers, timeout=10)
+                response.raise_for_status()
+            catalog_data = orjson.loads(response.content)
+            self._save_catalog_cache(response, catalog_data)
             return catalog_data
-        except (HTTPError, ConnectionError, Timeout) as e:
-            self.logger.error(f"Error fetching catalog: {e}")
+        except RequestException as e:
+            self.logger.error("Error fetching catalog: %s", e)
             raise
-        except json.JSONDecodeError as e:
-            self.logger.error(f"Error decoding catalog JSON: {e}")
+        except orjson.JSONDecodeError as e:
+            self.logger.error("Error decoding catalog JSON: %s", e)
             raise
 
     def fetch_thread(self, thread_no: int) -> Dict[str, Any]:
@@ -90,22 +460,49 @@ class FourChanFetcher:
         ------
         requests.exceptions.RequestException
             If an error occurs while making the HTTP request.
-        json.JSONDecodeError
+        orjson.JSONDecodeError
             If the response cannot be decoded as JSON.
         """
         thread_url = f"{self.BASE_URL}/{self.board}/thread/{thread_no}.json"
         try:
-            response = self.session.get(thread_url, headers=self.headers, timeout=10)
+            self._bucket.acquire()
+            response = self.session.get(thread_url, headers=self._request_headers, timeout=10)
             response.raise_for_status()
-            thread_data = response.json()
+            thread_data = orjson.loads(response.content)
             return thread_data
-        except (HTTPError, ConnectionError, Timeout) as e:
-            self.logger.error(f"Error fetching thread {thread_no}: {e}")
+        except RequestException as e:
+            self.logger.error("Error fetching thread %s: %s", thread_no, e)
             raise
-        except json.JSONDecodeError as e:
-            self.logger.error(f"Error decoding thread JSON: {e}")
+        except orjson.JSONDecodeError as e:
+            self.logger.error("Error decoding thread JSON: %s", e)
             raise
 
+    def _split_posts(self, thread_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Extracts thread starter and image post records in a single pass over the posts.
+
+        Parameters
+        ----------
+        thread_data : dict
+            The thread data containing posts.
+
+        Returns
+        -------
+        tuple of (list of dict, list of dict)
+            The thread starter records and the image post records.
+        """
+        starters = []
+        images = []
+        url_prefix = f"{self.IMAGE_URL}/{self.board}/"
+        for post in thread_data.get('posts', []):
+            if 'sub' in post:
+                starters.append(_project_starter(post))
+            if 'tim' in post and 'ext' in post:
+                record = _project_image(post)
+                record['url'] = url_prefix + str(post['tim']) + post['ext']
+                images.append(record)
+        return starters, images
+
     def save_thread_starter(self, thread_data: Dict[str, Any]):
         """
         Saves the thread starter post to a JSON file.
@@ -115,28 +512,13 @@ class FourChanFetcher:
         thread_data : dict
             The thread data containing posts.
         """
-        thread_starter_posts = [
-            post for post in thread_data.get('posts', []) if 'sub' in post
-        ]
-        thread_starter_data = []
-        for post in thread_starter_posts:
-            data = {
-                'no': post['no'],
-                'now': post.get('now', ''),
-                'name': post.get('name', ''),
-                'sub': post.get('sub', ''),
-                'time': post.get('time', 0),
-                'semantic_url': post.get('semantic_url', ''),
-                'replies': post.get('replies', 0),
-                'images': post.get('images', 0)
-            }
-            thread_starter_data.append(data)
-        filename = os.path.join(self.base_path, 'thread_list.json')
-        save_to_json(thread_starter_data, filename, append=True, logger=self.logger)
+        starters, _ = self._split_posts(thread_data)
+        self._write_thread_starters(starters)
 
     def save_image_posts(self, thread_data: Dict[str, Any], thread_no: int):
         """
-        Saves image posts from a thread to a JSON file.
+        Saves image posts from a thread to a JSON file and, if enabled, schedules
+        the images themselves for download.
 
         Parameters
         ----------
@@ -145,27 +527,47 @@ class FourChanFetcher:
         thread_no : int
             The thread number for filename reference.
         """
-        images_info = [
-            {
-                'no': post['no'],
-                'now': post.get('now', ''),
-                'name': post.get('name', ''),
-                'com': post.get('com', ''),
-                'filename': post.get('filename', ''),
-                'ext': post.get('ext', ''),
-                'w': post.get('w', 0),
-                'h': post.get('h', 0),
-                'time': post.get('time', 0),
-                'md5': post.get('md5', ''),
-                'fsize': post.get('fsize', 0),
-                'resto': post.get('resto', 0),
-                'url': f"{self.IMAGE_URL}/{self.board}/{post['tim']}{post['ext']}"
-            }
-            for post in thread_data.get('posts', [])
-            if 'tim' in post and 'ext' in post
-        ]
-        filename = os.path.join(self.base_path, 'images', f"{self.board}-{thread_no}_ImageURLs.json")
+        _, images = self._split_posts(thread_data)
+        self._write_image_posts(images, thread_no)
+
+    def _write_thread_starters(self, thread_starter_data: List[Dict[str, Any]]):
+        """
+        Queues thread starter records to be appended to the thread list file.
+
+        Parameters
+        ----------
+        thread_starter_data : list of dict
+            The thread starter records, as returned by ``_split_posts``.
+        """
+        if thread_starter_data:
+            self._get_writeq().put(b''.join(orjson.dumps(entry) + b'\n' for entry in thread_starter_data))
+
+    def _write_image_posts(self, images_info: List[Dict[str, Any]], thread_no: int):
+        """
+        Saves image post records from a thread to a JSON file and, if enabled,
+        schedules the images themselves for download.
+
+        Parameters
+        ----------
+        images_info : list of dict
+            The image post records, as returned by ``_split_posts``.
+        thread_no : int
+            The thread number for filename reference.
+        """
+        filename = os.path.join(self._images_dir, f"{self.board}-{thread_no}_ImageURLs.json")
         save_to_json(images_info, filename, append=False, logger=self.logger)
+        if self.prefetcher:
+            images_dir = self._images_dir
+            submit = self.prefetcher.submit
+            for info in images_info:
+                # 4chan's md5 is base64 and may contain '/', so name files by its hex form,
+                # falling back to the server's file name when it is missing or malformed.
+                try:
+                    digest = base64.b64decode(info['md5'], validate=True).hex()
+                except binascii.Error:
+                    digest = ''
+                name = digest + info['ext'] if digest else info['url'].rsplit('/', 1)[-1]
+                submit(info['url'], os.path.join(images_dir, name))
 
     def fetch_and_save_thread(self, thread_no: int):
         """
@@ -178,13 +580,14 @@ class FourChanFetcher:
         """
         try:
             thread_data = self.fetch_thread(thread_no)
-            self.logger.info(f"Fetched thread number {thread_no}")
-            self.save_thread_starter(thread_data)
-            self.logger.info(f"Saved thread starter for thread {thread_no}")
-            self.save_image_posts(thread_data, thread_no)
-            self.logger.info(f"Saved image posts for thread {thread_no}")
+            self.logger.info("Fetched thread number %s", thread_no)
+            starters, images = self._split_posts(thread_data)
+            self._write_thread_starters(starters)
+            self.logger.info("Saved thread starter for thread %s", thread_no)
+            self._write_image_posts(images, thread_no)
+            self.logger.info("Saved image posts for thread %s", thread_no)
         except Exception as e:
-            self.logger.error(f"Failed to process thread {thread_no}: {e}")
+            self.logger.error("Failed to process thread %s: %s", thread_no, e)
 
     def fetch_top_threads(self, threads: int = 5, offset: int = 0):
         """
@@ -196,30 +599,37 @@ class FourChanFetcher:
             Number of threads to fetch.
         offset : int
             Offset to start fetching threads from.
+
+        Raises
+        ------
+        ValueError
+            If threads or offset is negative.
         """
+        if threads < 0 or offset < 0:
+            raise ValueError(f"threads and offset must be non-negative, got threads={threads}, offset={offset}")
+        if self._closed:
+            raise RuntimeError("FourChanFetcher is closed")
         try:
             catalog = self.fetch_catalog()
-            all_threads = []
-            for page in catalog:
-                all_threads.extend(page.get('threads', []))
+            catalog_threads = chain.from_iterable(page.get('threads', []) for page in catalog)
             selected_threads = [
-                thread['no'] for thread in all_threads[offset:offset + threads]
+                thread['no'] for thread in islice(catalog_threads, offset, offset + threads)
             ]
-            self.logger.info(f"Selected threads: {selected_threads}")
-
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                futures = {
-                    executor.submit(self.fetch_and_save_thread, thread_no): thread_no
-                    for thread_no in selected_threads
-                }
-                for future in tqdm(as_completed(futures), total=len(futures), desc='Fetching threads'):
-                    thread_no = futures[future]
-                    try:
-                        future.result()
-                        time.sleep(1)  # Rate limiting
-                    except Exception as e:
-                        self.logger.error(f"Thread {thread_no} generated an exception: {e}")
+            self.logger.info("Selected threads: %s", selected_threads)
+
+            # fetch_and_save_thread logs and swallows its own errors, so one
+            # failing thread does not stop the others.
+            thread_map(
+                self.fetch_and_save_thread, selected_threads,
+                max_workers=self.max_workers, desc='Fetching threads'
+            )
+
+            # Make sure every queued thread starter and image is on disk before returning.
+            if self._writeq is not None:
+                self._writeq.join()
+            if self.prefetcher:
+                self.prefetcher.wait()
 
         except Exception as e:
-            self.logger.error(f"An error occurred while fetching top threads: {e}")
+            self.logger.error("An error occurred while fetching top threads: %s", e)
             raise
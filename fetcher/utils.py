@@ -1,10 +1,21 @@
 # fetcher/utils.py
 
 import os
-import json
+import time
+import queue
+import atexit
 import logging
+import threading
+import orjson
+from logging.handlers import QueueHandler, QueueListener
 from typing import List, Dict, Any
 
+# This set can be updated to include all valid board names
+_VALID_BOARDS = frozenset({
+    'po', 'g', 'b', 'hr', 'biz', 'fit', 'pol', 'sci', 'tech', 'news',
+    # Add more valid board names here
+})
+
 
 def create_logger(name: str, log_file: str = None) -> logging.Logger:
     """
@@ -23,7 +34,11 @@ def create_logger(name: str, log_file: str = None) -> logging.Logger:
         Configured logger instance.
     """
     logger = logging.getLogger(name)
+    # Already configured by an earlier call; adding handlers again would duplicate output.
+    if logger.handlers:
+        return logger
     logger.setLevel(logging.INFO)
+    logger.propagate = False
 
     formatter = logging.Formatter(
         '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
@@ -33,14 +48,22 @@ def create_logger(name: str, log_file: str = None) -> logging.Logger:
     ch = logging.StreamHandler()
     ch.setLevel(logging.INFO)
     ch.setFormatter(formatter)
-    logger.addHandler(ch)
+    handlers = [ch]
 
     # File handler
     if log_file:
         fh = logging.FileHandler(log_file, mode='a')
         fh.setLevel(logging.INFO)
         fh.setFormatter(formatter)
-        logger.addHandler(fh)
+        handlers.append(fh)
+
+    # Emit from a background listener so worker threads only enqueue records
+    # instead of blocking on console and file I/O.
+    log_queue = queue.Queue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(QueueHandler(log_queue))
 
     return logger
 
@@ -60,17 +83,17 @@ def save_to_json(data: List[Dict[str, Any]], filename: str, append: bool = True,
     logger : logging.Logger
         Logger for logging messages.
     """
-    mode = 'a' if append else 'w'
+    mode = 'ab' if append else 'wb'
     if logger:
-        logger.info(f"Saving data to {filename}")
+        logger.info("Saving data to %s", filename)
     try:
+        # Build the whole payload up front so it goes out in a single write.
+        payload = b''.join(orjson.dumps(entry) + b'\n' for entry in data)
         with open(filename, mode) as file:
-            for entry in data:
-                json_line = json.dumps(entry)
-                file.write(f"{json_line}\n")
+            file.write(payload)
     except Exception as e:
         if logger:
-            logger.error(f"Error saving data to {filename}: {e}")
+            logger.error("Error saving data to %s: %s", filename, e)
         raise
 
 
@@ -110,10 +133,42 @@ def validate_board_name(board: str):
     ValueError
         If the board name is invalid.
     """
-    # This list can be updated to include all valid board names
-    valid_boards = [
-        'po', 'g', 'b', 'hr', 'biz', 'fit', 'pol', 'sci', 'tech', 'news',
-        # Add more valid board names here
-    ]
-    if board not in valid_boards:
+    if board not in _VALID_BOARDS:
         raise ValueError(f"The board '{board}' is not a valid 4chan board.")
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket used to rate limit requests across workers.
+    """
+
+    def __init__(self, capacity: int, refill_per_sec: float):
+        """
+        Initializes the TokenBucket instance.
+
+        Parameters
+        ----------
+        capacity : int
+            Maximum number of tokens the bucket can hold (burst size).
+        refill_per_sec : float
+            Number of tokens added to the bucket per second.
+        """
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes a token from the bucket, sleeping until one is available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.last
+            self.last = now
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_sec)
+            self.tokens -= 1
+            wait = -self.tokens / self.refill_per_sec if self.tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
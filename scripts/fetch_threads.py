@@ -7,6 +7,27 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from fetcher.network import FourChanFetcher
 from fetcher.utils import create_logger
 
+
+def non_negative_int(value: str) -> int:
+    """
+    Parses a command-line argument as an integer that must not be negative.
+    """
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be non-negative, got {number}")
+    return number
+
+
+def positive_int(value: str) -> int:
+    """
+    Parses a command-line argument as an integer that must be at least 1.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(description="Fetch threads and images from 4chan")
     parser.add_argument(
@@ -14,36 +35,46 @@ def main():
         help="The board to fetch from (e.g., po, g, etc.)"
     )
     parser.add_argument(
-        '-t', '--threads', type=int, default=5,
+        '-t', '--threads', type=non_negative_int, default=5,
         help="Number of threads to fetch"
     )
     parser.add_argument(
-        '-o', '--offset', type=int, default=0,
+        '-o', '--offset', type=non_negative_int, default=0,
         help="Offset to start fetching threads from"
     )
     parser.add_argument(
         '-d', '--directory', type=str, default='.',
         help="Output directory for saving data"
     )
+    parser.add_argument(
+        '-w', '--workers', type=positive_int, default=5,
+        help="Number of threads to fetch concurrently"
+    )
+    parser.add_argument(
+        '-i', '--images', action='store_true',
+        help="Download image files in addition to saving their URLs"
+    )
     args = parser.parse_args()
 
     logger = create_logger('fetch_4chan', log_file='fetch_4chan.log')
-    logger.info(f"Starting fetching process for board: {args.board}")
+    logger.info("Starting fetching process for board: %s", args.board)
 
     try:
-        fetcher = FourChanFetcher(
+        with FourChanFetcher(
             board=args.board,
             output_dir=args.directory,
-            logger=logger
-        )
-        fetcher.fetch_top_threads(threads=args.threads, offset=args.offset)
+            logger=logger,
+            max_workers=args.workers,
+            download_images=args.images
+        ) as fetcher:
+            fetcher.fetch_top_threads(threads=args.threads, offset=args.offset)
         logger.info("Fetching process completed successfully.")
     except ValueError as ve:
-        logger.error(f"Validation error: {ve}")
+        logger.error("Validation error: %s", ve)
         print(f"Error: {ve}. Please check the board name and try again.")
         sys.exit(1)
     except Exception as e:
-        logger.error(f"An error occurred: {e}")
+        logger.error("An error occurred: %s", e)
         print(f"An unexpected error occurred: {e}. Please check the logs for more details.")
         sys.exit(1)
 